@@ -0,0 +1,11 @@
+class LoginTokenConverter:
+    """mailauth login tokens are signed values made of base62 and urlsafe base64
+    parts separated by colons: they never contain a slash"""
+
+    regex = "[^/]+"
+
+    def to_python(self, value):
+        return value
+
+    def to_url(self, value):
+        return value
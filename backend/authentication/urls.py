@@ -1,12 +1,15 @@
-from django.urls import include, path, re_path
+from django.urls import include, path, register_converter
 
 from . import views
+from .converters import LoginTokenConverter
 from .views import profile, register
 
+register_converter(LoginTokenConverter, "logintoken")
+
 urlpatterns = [
     path("login/", views.LoginView.as_view(), name="login"),
-    re_path(
-        "login/(?P<token>.*)$",
+    path(
+        "login/<logintoken:token>",
         views.EcobalyseLoginTokenView.as_view(),
         name="login-token",
     ),
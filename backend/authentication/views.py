@@ -4,7 +4,8 @@ import logging
 from django.conf import settings
 from django.core.exceptions import PermissionDenied
 from django.http import JsonResponse, response
-from django.utils.translation import gettext_lazy as _
+from django.utils.translation import gettext as _
+from django.utils.translation import gettext_lazy
 from django.views.decorators.http import require_http_methods
 from mailauth.views import (
     LoginTokenView as MailauthLoginTokenView,
@@ -79,7 +80,7 @@ class LoginView(MailauthLoginView):
     extra_context = {
         "site_header": "Ecobalyse",
         "site_title": "Ecobalyse",
-        "title": _("Login"),
+        "title": gettext_lazy("Login"),
     }
 
     def post(self, request, *a, **kw):
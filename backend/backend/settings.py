@@ -168,9 +168,9 @@ LANGUAGES = [
 ]
 LOCALE_PATHS = (
     join(BASE_DIR, "locale"),
-    join("authentication", "locale"),
-    join("backend", "locale"),
-    join("textile", "locale"),
+    join(BASE_DIR, "authentication", "locale"),
+    join(BASE_DIR, "backend", "locale"),
+    join(BASE_DIR, "textile", "locale"),
 )
 
 # Static files (CSS, JavaScript, Images)
@@ -1,11 +1,12 @@
 import os
 
+from django.conf import settings
 from django.http import Http404
 from django.views.static import serve
 
 
 def serve_directory(request, path=""):
-    document_root = "dist"
+    document_root = os.path.join(settings.GITROOT, "dist")
     if not os.path.exists(os.path.join(document_root, path)):
         raise Http404("File not found")
     return serve(
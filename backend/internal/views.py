@@ -1,17 +1,44 @@
+import hashlib
+import json
+
 from authentication.models import EcobalyseUser
-from django.http import JsonResponse
+from django.core.cache import cache
+from django.http import HttpResponse, JsonResponse
+
+# The express server checks the token on each API call, so cache the result to
+# avoid a DB query per request. Invalid tokens are cached for a shorter time.
+VALID_TOKEN_CACHE_TIMEOUT = 300
+INVALID_TOKEN_CACHE_TIMEOUT = 30
+
+# The error body never changes, encode it once
+INVALID_TOKEN_BODY = json.dumps({"error": "This token isn't valid."}).encode()
 
 
 def is_token_valid(token):
-    return EcobalyseUser.objects.filter(token=token).count() > 0
+    return EcobalyseUser.objects.filter(token=token).exists()
+
+
+def is_token_valid_cached(token):
+    if not token:
+        return False
+    # hash the token so that raw tokens are never stored in the cache
+    key = "token:" + hashlib.sha256(token.encode("utf-8")).hexdigest()
+    valid = cache.get(key)
+    if valid is None:
+        valid = is_token_valid(token)
+        cache.set(
+            key,
+            valid,
+            VALID_TOKEN_CACHE_TIMEOUT if valid else INVALID_TOKEN_CACHE_TIMEOUT,
+        )
+    return valid
 
 
 def check_token(request):
     token = request.headers.get("token")
-    if is_token_valid(token):
+    if is_token_valid_cached(token):
         return JsonResponse({})
     else:
-        return JsonResponse(
-            {"error": "This token isn't valid."},
-            status=401,
+        return HttpResponse(
+            INVALID_TOKEN_BODY, status=401, content_type="application/json"
         )
@@ -0,0 +1,44 @@
+import pytest
+from authentication.models import EcobalyseUser
+from django.core.cache import cache
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.mark.django_db
+def test_check_token_without_token(client):
+    response = client.get("/internal/check_token")
+
+    assert response.status_code == 401
+    assert response.json() == {"error": "This token isn't valid."}
+
+
+@pytest.mark.django_db
+def test_check_token_with_invalid_token(client):
+    response = client.get("/internal/check_token", headers={"token": "invalid"})
+
+    assert response.status_code == 401
+
+
+@pytest.mark.django_db
+def test_check_token_with_valid_token(client, django_assert_num_queries):
+    user = EcobalyseUser.objects.create(email="testuser@test.com")
+
+    with django_assert_num_queries(1):
+        response = client.get(
+            "/internal/check_token", headers={"token": str(user.token)}
+        )
+    assert response.status_code == 200
+    assert response.json() == {}
+
+    # the result is cached, the DB is not queried anymore
+    with django_assert_num_queries(0):
+        response = client.get(
+            "/internal/check_token", headers={"token": str(user.token)}
+        )
+    assert response.status_code == 200
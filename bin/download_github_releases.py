@@ -13,9 +13,32 @@ import requests
 # See https://docs.astral.sh/ruff/rules/unused-import/
 from ecobalyse import logging_config as logging_config
 from ecobalyse.github import get_github
+from requests.adapters import HTTPAdapter
+from urllib3.util import Retry
 
 logger = logging.getLogger(__name__)
 
+# Timeout of the connection and of each read of the stream, not of the whole download
+DOWNLOAD_TIMEOUT_SECONDS = 30
+
+# Release assets are all served by the same GitHub hosts, reuse the connections
+# (keep-alive) between the downloads and retry with an exponential backoff when
+# GitHub is rate limiting or temporarily unavailable
+session = requests.Session()
+session.mount(
+    "https://",
+    HTTPAdapter(
+        max_retries=Retry(
+            total=5,
+            backoff_factor=1,
+            status_forcelist=[429, 502, 503, 504],
+            respect_retry_after_header=True,
+            # return the last response so that the error is logged below
+            raise_on_status=False,
+        )
+    ),
+)
+
 
 def download_file(url, destination_directory=None):
     local_filename = url.split("/")[-1]
@@ -25,7 +48,7 @@ def download_file(url, destination_directory=None):
 
     logger.debug(f"-> Downloading {url} to {local_filename}")
 
-    with requests.get(url, stream=True) as r:
+    with session.get(url, stream=True, timeout=DOWNLOAD_TIMEOUT_SECONDS) as r:
         if r.status_code == 200:
             with open(local_filename, "wb") as f:
                 shutil.copyfileobj(r.raw, f)
@@ -5,14 +5,18 @@ import logging
 import os
 import pathlib
 import sys
+import threading
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import contextmanager
 from datetime import datetime
 from enum import StrEnum
 
 import pandas as pd
 import requests
+from requests.adapters import HTTPAdapter
 from sqlalchemy import create_engine, text
+from urllib3.util import Retry
 
 # Constants
 
@@ -24,6 +28,12 @@ IMPACTS_ECOBALYSE_PATH = os.path.join(
 
 TODAY_DATETIME_STR = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
+# Number of concurrent API calls when computing the examples scores. The API runs
+# the simulations on a single node thread: a second worker only keeps it busy while
+# the other request or response is in transit, more workers would just queue there
+API_MAX_WORKERS = 2
+API_TIMEOUT_SECONDS = 60
+
 
 class Domain(StrEnum):
     TEXTILE = "textile"
@@ -58,6 +68,28 @@ DOMAIN_DATA = {
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("logger")
 
+# Reuse the connections to the API between the calls (keep-alive). requests doesn't
+# guarantee that a Session is thread-safe, so each worker thread gets its own.
+# Simulations are idempotent, so POST requests are retried with an exponential
+# backoff when the API is throttled or unavailable
+api_retry = Retry(
+    total=5,
+    backoff_factor=1,
+    status_forcelist=[429, 502, 503, 504],
+    allowed_methods=["GET", "POST"],
+    respect_retry_after_header=True,
+)
+thread_local = threading.local()
+
+
+def get_session():
+    if not hasattr(thread_local, "session"):
+        session = requests.Session()
+        session.mount("http://", HTTPAdapter(max_retries=api_retry))
+        session.mount("https://", HTTPAdapter(max_retries=api_retry))
+        thread_local.session = session
+    return thread_local.session
+
 
 def get_arguments():
     if len(sys.argv) < 4:
@@ -197,6 +229,9 @@ def create_df_textile(
     # The step is either a transport step, a lifecycle step in that case we use the "label" field
     # if it's not either one it's a "Total" step
     step_label = "Transport" if is_transport else step.get("label", "Total")
+    # Serialized once, shared by the impacts and the complements rows
+    query_json = json.dumps(query)
+    elements_json = json.dumps(query["materials"])
 
     data = {
         "datetime": TODAY_DATETIME_STR,
@@ -205,9 +240,9 @@ def create_df_textile(
         "domain": "textile",
         "product_name": example["name"],
         "id": example["id"],
-        "query": json.dumps(query),
+        "query": query_json,
         "mass": query["mass"],
-        "elements": json.dumps(query["materials"]),
+        "elements": elements_json,
         "lifecycle_step": step_label,
         "lifecycle_step_country": step.get("country", {}).get("code", ""),
         "impact": impacts.index.tolist(),
@@ -226,9 +261,9 @@ def create_df_textile(
             "domain": "textile",
             "product_name": example["name"],
             "id": example["id"],
-            "query": json.dumps(query),
+            "query": query_json,
             "mass": query["mass"],
-            "elements": json.dumps(query["materials"]),
+            "elements": elements_json,
             "lifecycle_step": step_label,
             "lifecycle_step_country": step.get("country", {}).get("code", ""),
             "impact": complementsImpacts.index.tolist(),
@@ -324,6 +359,9 @@ def create_df_food(
         impacts_sr = pd.Series(impacts["ingredientsTotal"], dtype="float64")
     else:
         impacts_sr = pd.Series(impacts, dtype="float64")
+    # Serialized once, shared by the impacts and the complements rows
+    query_json = json.dumps(example["query"])
+    elements_json = json.dumps(example["query"]["ingredients"])
 
     data = {
         "datetime": TODAY_DATETIME_STR,
@@ -332,9 +370,9 @@ def create_df_food(
         "domain": "food",
         "product_name": example["name"],
         "id": example["id"],
-        "query": json.dumps(example["query"]),
+        "query": query_json,
         "mass": example["response"]["results"]["preparedMass"],
-        "elements": json.dumps(example["query"]["ingredients"]),
+        "elements": elements_json,
         "lifecycle_step": lifecycle_step,
         "lifecycle_step_country": "",
         "impact": impacts_sr.index.tolist(),
@@ -353,9 +391,9 @@ def create_df_food(
             "domain": "food",
             "product_name": example["name"],
             "id": example["id"],
-            "query": json.dumps(example["query"]),
+            "query": query_json,
             "mass": example["response"]["results"]["preparedMass"],
-            "elements": json.dumps(example["query"]["ingredients"]),
+            "elements": elements_json,
             "lifecycle_step": lifecycle_step,
             "lifecycle_step_country": "",
             "impact": complementsImpacts.index.tolist(),
@@ -434,15 +472,15 @@ def dataframe_to_dict(df, key_cols, value_cols):
     Returns:
     dict: Dictionary with concatenated keys and tuple values.
     """
-    # Concatenate the specified columns to form a single key column
-    df["master_key"] = df[key_cols].apply(
-        lambda row: "_".join(row.values.astype(str)), axis=1
-    )
-    df["master_value"] = df[value_cols].apply(lambda row: tuple(row), axis=1)
+    # Concatenate the specified columns to form a single key column, column by
+    # column rather than row by row
+    keys = df[key_cols[0]].astype(str)
+    for col in key_cols[1:]:
+        keys = keys + "_" + df[col].astype(str)
+    values = zip(*(df[col] for col in value_cols))
 
     # Create a dictionary with the new key column and the specified value column
-    result_dict = df.set_index("master_key")["master_value"].to_dict()
-    return result_dict
+    return dict(zip(keys, values))
 
 
 def get_previous_score(domain, score_history_df, current_branch):
@@ -500,7 +538,12 @@ def get_database_connection(engine):
 
 
 def get_score_history(engine):
-    query = text("SELECT * FROM score_history")
+    # Only fetch the columns needed to find and compare the previous scores: the
+    # table grows with every stored score, and `elements` is a large JSON text
+    query = text(
+        "SELECT datetime, branch, commit, domain, product_name, query, lifecycle_step,"
+        " lifecycle_step_country, impact, value, norm_value_ecs FROM score_history"
+    )
     with get_database_connection(engine) as conn:
         df = pd.read_sql(query, conn)
         return df
@@ -519,17 +562,24 @@ def insert_new_score(df, engine, table_name):
 
 
 def compute_product_scores(product_params, api_url):
-    r = requests.post(api_url, json=product_params["query"])
+    r = get_session().post(
+        api_url, json=product_params["query"], timeout=API_TIMEOUT_SECONDS
+    )
     return r.json()
 
 
 def compute_products_scores_for_examples(examples, api_url):
     computed_scores = []
 
-    for example in examples:
-        product_scores = compute_product_scores(example, api_url)
-        example["response"] = product_scores
-        computed_scores.append(example)
+    # The API calls are independent, overlap their round-trips with the simulations.
+    # `map` yields the results in the order of the examples.
+    with ThreadPoolExecutor(max_workers=API_MAX_WORKERS) as executor:
+        all_product_scores = executor.map(
+            lambda example: compute_product_scores(example, api_url), examples
+        )
+        for example, product_scores in zip(examples, all_product_scores):
+            example["response"] = product_scores
+            computed_scores.append(example)
 
     return computed_scores
 
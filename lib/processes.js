@@ -0,0 +1,38 @@
+const crypto = require("crypto");
+
+// Precompute the ETag so that clients can revalidate with a 304 response,
+// without hashing the whole payload on every request. The body is kept as bytes so
+// that `res.send` doesn't encode the string again on every request.
+function cacheableJson(data, visibility) {
+  const body = Buffer.from(JSON.stringify(data));
+  return {
+    body,
+    // Compressed bodies by encoding, see `compressProcesses` in server.js
+    encoded: {},
+    hash: crypto.createHash("sha1").update(body).digest("base64"),
+    headers: {
+      "Cache-Control": `${visibility}, no-cache`,
+      Vary: "token, Accept-Encoding",
+    },
+  };
+}
+
+/**
+ * Processes payloads never change at runtime: serialize the JSON envelopes once
+ * at startup rather than on every `processes.json` request.
+ * @param {Object} processesImpacts the detailed processes, served to token holders
+ * @param {Object} processes the processes without detailed impacts
+ * @returns {Object} the cacheable `processesImpacts` and `processes` responses
+ */
+function serializeProcesses(processesImpacts, processes) {
+  return {
+    // Detailed impacts depend on the token and must not be stored by shared caches
+    processesImpacts: cacheableJson(processesImpacts, "private"),
+    processes: cacheableJson(processes, "public"),
+  };
+}
+
+module.exports = {
+  cacheableJson,
+  serializeProcesses,
+};
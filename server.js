@@ -2,6 +2,8 @@ require("dotenv").config();
 const { monitorExpressApp } = require("./lib/instrument");
 const fs = require("fs");
 const path = require("path");
+const { promisify } = require("util");
+const zlib = require("zlib");
 const bodyParser = require("body-parser");
 const cors = require("cors");
 const yaml = require("js-yaml");
@@ -10,6 +12,7 @@ const { Elm } = require("./server-app");
 const jsonUtils = require("./lib/json");
 const { setupTracker, dataFiles } = require("./lib");
 const { decrypt } = require("./lib/crypto");
+const { serializeProcesses } = require("./lib/processes");
 const express = require("express");
 const rateLimit = require("express-rate-limit");
 
@@ -22,7 +25,14 @@ const djangoPort = 8002;
 const version = express(); // version app
 
 // Env vars
-const { ENABLE_FOOD_SECTION, MATOMO_HOST, MATOMO_SITE_ID, MATOMO_TOKEN, NODE_ENV } = process.env;
+const {
+  ENABLE_FOOD_SECTION,
+  MATOMO_HOST,
+  MATOMO_SITE_ID,
+  MATOMO_TOKEN,
+  NODE_ENV,
+  VERSIONS_DIR,
+} = process.env;
 
 var rateLimiter = rateLimit({
   windowMs: 1000, // 1 second
@@ -93,8 +103,53 @@ app.get("/accessibilite", (_, res) => res.redirect("/#/pages/accessibilité"));
 app.get("/mentions-legales", (_, res) => res.redirect("/#/pages/mentions-légales"));
 app.get("/stats", (_, res) => res.redirect("/#/stats"));
 
+const brotliCompress = promisify(zlib.brotliCompress);
+const gzip = promisify(zlib.gzip);
+
+// Brotli's default quality (11) takes ~0.7s on the public processes envelope, quality 5
+// takes ~7ms for a body only ~15% larger (40 kB vs 35 kB, from 500 kB)
+const processesEncoders = {
+  br: (body) => brotliCompress(body, { params: { [zlib.constants.BROTLI_PARAM_QUALITY]: 5 } }),
+  gzip: (body) => gzip(body, { level: zlib.constants.Z_BEST_COMPRESSION }),
+};
+
+// Compressions run one at a time so that they never hold more than one thread of the
+// libuv pool, which is shared with the fs and dns calls of the other requests
+let compressionQueue = Promise.resolve();
+
+// Compress the payload once per encoding, asynchronously so that the event loop is
+// never blocked. The pending promise is stored so that concurrent requests share
+// the same compression. Returns the compressed body, or null while it's not ready.
+function compressProcesses(response, encoding) {
+  if (!(encoding in response.encoded)) {
+    response.encoded[encoding] = compressionQueue = compressionQueue
+      .then(() => processesEncoders[encoding](response.body))
+      .then((buffer) => (response.encoded[encoding] = buffer))
+      .catch((err) => {
+        console.error(err);
+        // Allow a later request to try again
+        delete response.encoded[encoding];
+      });
+  }
+  const encoded = response.encoded[encoding];
+  return Buffer.isBuffer(encoded) ? encoded : null;
+}
+
+const sendProcesses = (req, res, response) => {
+  const encoding = req.acceptsEncodings(Object.keys(processesEncoders));
+  // Serve the plain body until the compressed one is ready
+  const encoded = encoding ? compressProcesses(response, encoding) : null;
+  res.status(200).set(response.headers).type("json");
+  if (!encoded) {
+    return res.set("ETag", `"${response.hash}"`).send(response.body);
+  }
+  return res
+    .set({ "Content-Encoding": encoding, ETag: `"${response.hash}-${encoding}"` })
+    .send(encoded);
+};
+
 // Versions
-const versionsDir = "./versions";
+const versionsDir = path.resolve(__dirname, VERSIONS_DIR || "versions");
 let availableVersions = [];
 
 // Loading existing versions in memory
@@ -131,18 +186,21 @@ if (fs.existsSync(versionsDir)) {
       textileProcesses: decrypt(JSON.parse(fs.readFileSync(textileDetailedEnc).toString("utf-8"))),
     };
 
+    const processes = {
+      foodProcesses: fs.readFileSync(foodNoDetails, "utf8"),
+      // Old versions don't have the object files
+      objectProcesses: fs.existsSync(objectNoDetails)
+        ? fs.readFileSync(objectNoDetails, "utf8")
+        : null,
+
+      textileProcesses: fs.readFileSync(textileNoDetails, "utf8"),
+    };
+
     availableVersions.push({
       dir,
-      processes: {
-        foodProcesses: fs.readFileSync(foodNoDetails, "utf8"),
-        // Old versions don't have the object files
-        objectProcesses: fs.existsSync(objectNoDetails)
-          ? fs.readFileSync(objectNoDetails, "utf8")
-          : null,
-
-        textileProcesses: fs.readFileSync(textileNoDetails, "utf8"),
-      },
+      processes,
       processesImpacts,
+      processesResponses: serializeProcesses(processesImpacts, processes),
     });
   }
 }
@@ -169,6 +227,16 @@ const processes = {
   textileProcesses: fs.readFileSync(dataFiles.textileNoDetails, "utf8"),
 };
 
+const processesResponses = serializeProcesses(processesImpacts, processes);
+
+// Queue the compression of the current payloads in the background right away, versions
+// payloads are compressed on their first request
+for (const response of Object.values(processesResponses)) {
+  for (const encoding of Object.keys(processesEncoders)) {
+    compressProcesses(response, encoding);
+  }
+}
+
 const getProcesses = async (token, customProcessesImpacts, customProcesses) => {
   let isTokenValid = false;
   if (token) {
@@ -197,7 +265,15 @@ function processOpenApi(contents, versionNumber) {
 }
 
 app.get("/processes/processes.json", async (req, res) => {
-  return res.status(200).send(await getProcesses(req.headers.token));
+  return sendProcesses(
+    req,
+    res,
+    await getProcesses(
+      req.headers.token,
+      processesResponses.processesImpacts,
+      processesResponses.processes,
+    ),
+  );
 });
 
 const elmApp = Elm.Server.init();
@@ -249,7 +325,7 @@ const checkVersionAndPath = (req, res, next) => {
   if (!version) {
     res.status(404).send("Version not found");
   }
-  const staticDir = path.join(__dirname, "versions", versionNumber);
+  const staticDir = path.join(versionsDir, versionNumber);
   req.staticDir = staticDir;
   next();
 };
@@ -296,11 +372,17 @@ version.all("/:versionNumber/api/*", checkVersionAndPath, bodyParser.json(), asy
 
 version.get("/:versionNumber/processes/processes.json", checkVersionAndPath, async (req, res) => {
   const versionNumber = req.params.versionNumber;
-  const { processesImpacts, processes } = availableVersions.find(
-    (version) => version.dir === versionNumber,
+  const { processesResponses } = availableVersions.find((version) => version.dir === versionNumber);
+
+  return sendProcesses(
+    req,
+    res,
+    await getProcesses(
+      req.headers.token,
+      processesResponses.processesImpacts,
+      processesResponses.processes,
+    ),
   );
-
-  return res.status(200).send(await getProcesses(req.headers.token, processesImpacts, processes));
 });
 
 api.use(cors()); // Enable CORS for all API requests
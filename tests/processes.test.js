@@ -0,0 +1,34 @@
+const { serializeProcesses } = require("../lib/processes");
+
+const processesImpacts = { foodProcesses: '[{"id":"detailed"}]' };
+const processes = { foodProcesses: '[{"id":"public"}]' };
+
+describe("lib.processes", () => {
+  describe("serializeProcesses", () => {
+    const responses = serializeProcesses(processesImpacts, processes);
+
+    it("should serialize the envelopes as bytes", () => {
+      expect(Buffer.isBuffer(responses.processes.body)).toBe(true);
+      expect(JSON.parse(responses.processes.body)).toEqual(processes);
+      expect(JSON.parse(responses.processesImpacts.body)).toEqual(processesImpacts);
+    });
+
+    it("should let shared caches store the public processes only", () => {
+      expect(responses.processes.headers["Cache-Control"]).toBe("public, no-cache");
+      expect(responses.processesImpacts.headers["Cache-Control"]).toBe("private, no-cache");
+    });
+
+    it("should vary on the token and the encoding", () => {
+      for (const response of Object.values(responses)) {
+        expect(response.headers["Vary"]).toBe("token, Accept-Encoding");
+      }
+    });
+
+    it("should give each envelope its own ETag hash", () => {
+      expect(responses.processes.hash).not.toBe(responses.processesImpacts.hash);
+      expect(serializeProcesses(processesImpacts, processes).processes.hash).toBe(
+        responses.processes.hash,
+      );
+    });
+  });
+});
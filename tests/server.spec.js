@@ -1,5 +1,30 @@
 const fs = require("fs");
+const http = require("http");
+const os = require("os");
+const path = require("path");
 const request = require("supertest");
+const zlib = require("zlib");
+
+// A minimal version fixture, in a temporary directory the server loads its versions from
+require("dotenv").config();
+process.env.ENCRYPTION_KEY ||= "0".repeat(32);
+process.env.VERSIONS_DIR = fs.mkdtempSync(path.join(os.tmpdir(), "ecobalyse-versions-"));
+const { encrypt } = require("../lib/crypto");
+const { dataFiles } = require("../lib");
+const testVersion = "jest-processes";
+const testVersionDir = path.join(process.env.VERSIONS_DIR, testVersion);
+for (const domain of ["food", "object", "textile"]) {
+  fs.mkdirSync(path.join(testVersionDir, "data", domain), { recursive: true });
+  fs.copyFileSync(
+    dataFiles[`${domain}NoDetails`],
+    path.join(testVersionDir, "data", domain, "processes.json"),
+  );
+  fs.writeFileSync(
+    path.join(testVersionDir, `processes_impacts_${domain}.json.enc`),
+    JSON.stringify(encrypt(fs.readFileSync(dataFiles[`${domain}Detailed`], "utf8"))),
+  );
+}
+
 const app = require("../server");
 const textileExamples = require("../public/data/textile/examples.json");
 
@@ -14,6 +39,66 @@ describe("Web", () => {
   });
 });
 
+describe("Processes", () => {
+  describe("/processes/processes.json", () => {
+    it("should render the processes serialized as JSON strings", async () => {
+      const response = await getProcesses("/processes/processes.json");
+
+      expectStatus(response, 200);
+      expectProcessesAsStrings(response.body);
+    });
+
+    it("should render the processes uncompressed for identity", async () => {
+      const response = await getRawProcesses("/processes/processes.json", "identity");
+
+      expect(response.statusCode).toBe(200);
+      expect(response.headers["content-encoding"]).toBeUndefined();
+      expectProcessesAsStrings(JSON.parse(response.body.toString("utf8")));
+    });
+
+    it("should render the processes brotli compressed with their own ETag", async () => {
+      const plain = await getRawProcesses("/processes/processes.json", "identity");
+      // Compression runs in the background, the plain body is served until it's ready
+      let compressed = await getRawProcesses("/processes/processes.json", "br");
+      while (compressed.headers["content-encoding"] !== "br") {
+        await new Promise((resolve) => setTimeout(resolve, 50));
+        compressed = await getRawProcesses("/processes/processes.json", "br");
+      }
+
+      expect(compressed.statusCode).toBe(200);
+      expect(zlib.brotliDecompressSync(compressed.body).equals(plain.body)).toBe(true);
+      expect(compressed.headers["etag"]).toBeDefined();
+      expect(compressed.headers["etag"]).not.toBe(plain.headers["etag"]);
+    }, 10000);
+  });
+
+  for (const url of [
+    "/processes/processes.json",
+    `/versions/${testVersion}/processes/processes.json`,
+  ]) {
+    describe(url, () => {
+      it("should set the caching headers", async () => {
+        const response = await getProcesses(url);
+
+        expectStatus(response, 200);
+        expect(response.headers["cache-control"]).toBe("private, no-cache");
+        expect(response.headers["vary"]).toBe("token, Accept-Encoding");
+        expect(response.headers["etag"]).toBeDefined();
+      });
+
+      it("should render a 304 response when the ETag still matches", async () => {
+        const response = await getProcesses(url);
+        const revalidated = await getProcesses(url, {
+          "If-None-Match": response.headers["etag"],
+        });
+
+        expect(revalidated.status).toBe(304);
+        expect(revalidated.text).toBe("");
+      });
+    });
+  }
+});
+
 describe("API", () => {
   describe("Not found", () => {
     it("should render a 404 response", async () => {
@@ -627,6 +712,8 @@ afterAll(() => {
 
   writeE2eResult("textile");
   writeE2eResult("food");
+
+  fs.rmSync(process.env.VERSIONS_DIR, { recursive: true, force: true });
 });
 
 // Test helpers
@@ -639,6 +726,42 @@ async function makePostRequest(path, body) {
   return await request(app).post(path).send(body);
 }
 
+async function getProcesses(path, headers = {}) {
+  return await request(app).get(path).set("Accept-Encoding", "identity").set(headers);
+}
+
+// Bypasses supertest so that the response body isn't decompressed on the fly
+function getRawProcesses(path, encoding) {
+  return new Promise((resolve, reject) => {
+    http
+      .get(
+        {
+          host: "127.0.0.1",
+          port: app.address().port,
+          path,
+          headers: { "Accept-Encoding": encoding },
+        },
+        (res) => {
+          const chunks = [];
+          res.on("data", (chunk) => chunks.push(chunk));
+          res.on("end", () =>
+            resolve({ statusCode: res.statusCode, headers: res.headers, body: Buffer.concat(chunks) }),
+          );
+          res.on("error", reject);
+        },
+      )
+      .on("error", reject);
+  });
+}
+
+function expectProcessesAsStrings(body) {
+  // The Elm client decodes each processes list from a JSON string
+  for (const key of ["foodProcesses", "objectProcesses", "textileProcesses"]) {
+    expect(typeof body[key]).toBe("string");
+    expect(Array.isArray(JSON.parse(body[key]))).toBe(true);
+  }
+}
+
 function expectFieldErrorMessage(response, field, message) {
   expectStatus(response, 400);
   expect("errors" in response.body).toEqual(true);